@@ -1,41 +1,98 @@
+import hashlib
 import nltk
 import streamlit as st
-import preprocessor, helper
-import matplotlib.pyplot as plt
-import seaborn as sns
+import preprocessor, helper, charts
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
 # Download VADER lexicon at the start
 nltk.download('vader_lexicon')
 
-st.sidebar.title("Whatsapp Chat Analyzer")
+# Keyed on chat_id only (the leading underscore keeps Streamlit from hashing the
+# whole chat text on every rerun); bounded so old uploads don't pile up in memory
+@st.cache_resource(max_entries=4, ttl=3600)
+def load_chat(chat_id, _data):
+    """Parse the chat, score sentiment and split it per user once per uploaded file"""
+    df = preprocessor.preprocess(_data)
 
-uploaded_file = st.sidebar.file_uploader("Choose a file")
-if uploaded_file is not None:
-    # To read file as bytes:
-    bytes_data = uploaded_file.getvalue()
-    # Convert to string
-    data = bytes_data.decode("utf-8")
-    df = preprocessor.preprocess(data)
-    
     # Creating different columns for (Positive/Negative/Neutral)
     sentiments = SentimentIntensityAnalyzer()
     df["po"] = [sentiments.polarity_scores(i)["pos"] for i in df["message"]]  # Positive
     df["ne"] = [sentiments.polarity_scores(i)["neg"] for i in df["message"]]  # Negative
     df["nu"] = [sentiments.polarity_scores(i)["neu"] for i in df["message"]]  # Neutral
     df["compound"] = [sentiments.polarity_scores(i)["compound"] for i in df["message"]]
-    
+
     # Apply sentiment function
     df['value'] = df.apply(lambda row: helper.sentiment(row), axis=1)
 
+    # Conversation sessions and reply latencies for the whole chat
+    df = preprocessor.sessionize(df)
+
+    partitions, message_rows = preprocessor.partition_users(df)
+    return df, partitions, message_rows
+
+st.sidebar.title("Whatsapp Chat Analyzer")
+
+uploaded_file = st.sidebar.file_uploader("Choose a file")
+if uploaded_file is not None:
+    # To read file as bytes:
+    bytes_data = uploaded_file.getvalue()
+    # Convert to string
+    data = bytes_data.decode("utf-8")
+    chat_id = hashlib.sha1(bytes_data).hexdigest()
+    chat_df, partitions, message_rows = load_chat(chat_id, data)
+
     # Fetch unique users
-    user_list = df['user'].unique().tolist()
-    if 'group_notification' in user_list:
-        user_list.remove('group_notification')
+    user_list = [user for user in partitions if user != 'group_notification']
     user_list.sort()
     user_list.insert(0, "Overall")
     selected_user = st.sidebar.selectbox("Show analysis wrt", user_list)
-    
+
+    # Date range filter (rows are sorted by date, so this is a binary-search slice)
+    first_day = chat_df['only_date'].iloc[0]
+    last_day = chat_df['only_date'].iloc[-1]
+    date_range = st.sidebar.date_input("Date range", value=(first_day, last_day),
+                                       min_value=first_day, max_value=last_day)
+    if len(date_range) == 2:
+        start_date, end_date = date_range
+    elif len(date_range) == 1:
+        # Only the start has been picked so far
+        start_date, end_date = date_range[0], last_day
+    else:
+        # The field was cleared; show the whole chat
+        start_date, end_date = first_day, last_day
+
+    # Work on the selected user's precomputed partition, so switching users
+    # never rescans the whole chat
+    if selected_user == 'Overall':
+        df = preprocessor.filter_by_date(chat_df, start_date, end_date)
+        # Helpers that drop group notifications get a frame that has none
+        messages_df = preprocessor.filter_messages(chat_df, message_rows, start_date, end_date)
+    else:
+        df = preprocessor.filter_by_date(partitions[selected_user], start_date, end_date)
+        messages_df = df
+
+    # Bounded-memory top-K counting for very large archives
+    approx = st.sidebar.checkbox("Approximate word/emoji counts (low memory)",
+                                 help="Counts may be lower than exact by up to the chosen error. "
+                                      "The word cloud skips WordCloud's collocation and plural handling.")
+    # Error bound as a fraction of all counted words/emoji; smaller keeps more counters
+    epsilon = 0.001
+    if approx:
+        epsilon = st.sidebar.select_slider("Approximation error", options=[0.0001, 0.0005, 0.001, 0.005, 0.01],
+                                           value=0.001)
+
+    # Charts are rasterized in a worker pool and cached as PNG bytes keyed by
+    # (chat, user, chart, filters). show_chart reserves the chart's place on the
+    # page now; the images are filled in once all of them have been submitted.
+    # compute runs later on a worker thread, so a lambda returning a value that is
+    # already computed binds it as a default argument rather than by name.
+    pending = []
+
+    def show_chart(chart, draw, compute, figsize=None):
+        slot = st.empty()
+        key = (chat_id, selected_user, chart, start_date, end_date, approx, epsilon)
+        pending.append((slot, charts.render(key, draw, compute, figsize)))
+
     if st.sidebar.button("Show Analysis"):
         # Stats Area
         num_messages, words, num_media_messages, num_links = helper.fetch_stats(selected_user, df)
@@ -58,19 +115,13 @@ if uploaded_file is not None:
 
         # Monthly Timeline
         st.title("Monthly Timeline")
-        timeline = helper.monthly_timeline(selected_user, df)
-        fig, ax = plt.subplots()
-        ax.plot(timeline['time'], timeline['message'], color='green')
-        plt.xticks(rotation='vertical')
-        st.pyplot(fig)
+        show_chart('monthly_timeline', charts.line('time', 'message', color='green'),
+                   lambda: helper.monthly_timeline(selected_user, df))
 
         # Daily Timeline
         st.title("Daily Timeline")
-        daily_timeline = helper.daily_timeline(selected_user, df)
-        fig, ax = plt.subplots()
-        ax.plot(daily_timeline['only_date'], daily_timeline['message'], color='black')
-        plt.xticks(rotation='vertical')
-        st.pyplot(fig)
+        show_chart('daily_timeline', charts.line('only_date', 'message', color='black'),
+                   lambda: helper.daily_timeline(selected_user, df))
 
         # Activity Map
         st.title("Activity Map")
@@ -78,58 +129,46 @@ if uploaded_file is not None:
 
         with col1:
             st.header("Most Busy Day")
-            busy_day = helper.week_activity_map(selected_user, df)
-            fig, ax = plt.subplots()
-            ax.bar(busy_day.index, busy_day.values)
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart('week_activity_map', charts.bar(),
+                       lambda: helper.week_activity_map(selected_user, df))
         
         with col2:
             st.header("Most Busy Month")
-            busy_month = helper.month_activity_map(selected_user, df)
-            fig, ax = plt.subplots()
-            ax.bar(busy_month.index, busy_month.values, color='orange')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart('month_activity_map', charts.bar(color='orange'),
+                       lambda: helper.month_activity_map(selected_user, df))
 
         st.title("Weekly Activity Map")    
-        user_heatmap = helper.activity_heatmap(selected_user, df)
-        fig, ax = plt.subplots()  
-        ax = sns.heatmap(user_heatmap)
-        st.pyplot(fig)
+        show_chart('activity_heatmap', charts.heatmap(),
+                   lambda: helper.activity_heatmap(selected_user, df))
 
         # Finding Busiest Users in Group (Group Level)
         if selected_user == 'Overall':
             st.title("Most Busy Users")
-            x, new_df = helper.most_busy_users(df)
-            fig, ax = plt.subplots()
+            counts = preprocessor.message_counts(partitions, start_date, end_date)
+            busy_users, new_df = helper.most_busy_users(df, counts)
            
             col1, col2 = st.columns(2)
 
             with col1:
-                ax.bar(x.index, x.values)
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
+                show_chart('most_busy_users', charts.bar(), lambda busy_users=busy_users: busy_users)
             with col2:
                 st.dataframe(new_df)
 
+        # One word sketch feeds both the word cloud and the top-20 chart (approx mode only)
+        word_counts = charts.once(lambda: helper.word_sketch(selected_user, messages_df, epsilon) if approx else None)
+
         # WordCloud
         st.title("Wordcloud")
-        df_wc = helper.create_wordcloud(selected_user, df)
-        fig, ax = plt.subplots()
-        ax.imshow(df_wc)
-        st.pyplot(fig)
+        show_chart('wordcloud', charts.image(),
+                   lambda: helper.create_wordcloud(selected_user, messages_df, approx, epsilon, word_counts()))
 
         # Most Common Words
-        most_common_df = helper.most_common_words(selected_user, df)
-        fig, ax = plt.subplots()
-        ax.barh(most_common_df[0], most_common_df[1])
-        plt.xticks(rotation='vertical')
         st.title('Most Common Words')
-        st.pyplot(fig)
+        show_chart('most_common_words', charts.barh(),
+                   lambda: helper.most_common_words(selected_user, messages_df, approx, epsilon, word_counts()))
 
         # Emoji Analysis
-        emoji_df = helper.emoji_helper(selected_user, df)
+        emoji_df = helper.emoji_helper(selected_user, df, approx, epsilon)
         st.title("Emoji Analysis")
 
         col1, col2 = st.columns(2)
@@ -137,9 +176,45 @@ if uploaded_file is not None:
         with col1:
             st.dataframe(emoji_df)
         with col2:
-            fig, ax = plt.subplots()
-            ax.pie(emoji_df[1].head(), labels=emoji_df[0].head(), autopct="%0.2f")
-            st.pyplot(fig)
+            show_chart('emoji', charts.pie(autopct="%0.2f"), lambda emoji_df=emoji_df: emoji_df)
+
+        # ============= CONVERSATION ANALYSIS SECTION =============
+        st.markdown("---")
+        st.title("Conversation Analysis")
+
+        session_summary = helper.session_summary(selected_user, df)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Sessions", session_summary['Sessions'])
+        with col2:
+            st.metric("Sessions Started", session_summary['Started'])
+        with col3:
+            st.metric("Messages per Session", session_summary['Messages per Session'])
+        with col4:
+            st.metric("Median Reply (min)", session_summary['Median Reply (min)'])
+
+        st.header("Reply Times")
+        reply_times = helper.reply_times(selected_user, df)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.dataframe(reply_times)
+        with col2:
+            show_chart('reply_times', charts.barh(color='purple', y='user', width='median_minutes'),
+                       lambda reply_times=reply_times: reply_times.head(20))
+
+        st.header("Who Replies to Whom")
+        show_chart('reply_matrix', charts.heatmap(), lambda: helper.reply_matrix(selected_user, df))
+
+        if selected_user == 'Overall':
+            col1, col2 = st.columns(2)
+            with col1:
+                st.header("Conversation Starters")
+                show_chart('conversation_starters', charts.bar(color='purple'),
+                           lambda: helper.conversation_starters(df))
+            with col2:
+                st.header("Session Length")
+                show_chart('session_lengths', charts.hist(xlabel='messages per session'),
+                           lambda: helper.session_lengths(df))
 
         # ============= SENTIMENT ANALYSIS SECTION =============
         st.markdown("---")
@@ -156,197 +231,124 @@ if uploaded_file is not None:
             st.metric("Neutral Messages", sentiment_summary['Neutral'])
         with col3:
             st.metric("Negative Messages", sentiment_summary['Negative'])
-        
+
         # Monthly activity map
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("<h3 style='text-align: center; color: black;'>Monthly Activity map(Positive)</h3>",unsafe_allow_html=True)
-            busy_month = helper.month_activity_map_sentiment(selected_user, df, 1)
-            fig, ax = plt.subplots()
-            ax.bar(busy_month.index, busy_month.values, color='green')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('month_activity_map_sentiment', 1), charts.bar(color='green'),
+                       lambda: helper.month_activity_map_sentiment(selected_user, df, 1))
         with col2:
             st.markdown("<h3 style='text-align: center; color: black;'>Monthly Activity map(Neutral)</h3>",unsafe_allow_html=True)
-            busy_month = helper.month_activity_map_sentiment(selected_user, df, 0)
-            fig, ax = plt.subplots()
-            ax.bar(busy_month.index, busy_month.values, color='grey')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('month_activity_map_sentiment', 0), charts.bar(color='grey'),
+                       lambda: helper.month_activity_map_sentiment(selected_user, df, 0))
         with col3:
             st.markdown("<h3 style='text-align: center; color: black;'>Monthly Activity map(Negative)</h3>",unsafe_allow_html=True)
-            busy_month = helper.month_activity_map_sentiment(selected_user, df, -1)
-            fig, ax = plt.subplots()
-            ax.bar(busy_month.index, busy_month.values, color='red')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('month_activity_map_sentiment', -1), charts.bar(color='red'),
+                       lambda: helper.month_activity_map_sentiment(selected_user, df, -1))
 
         # Daily activity map
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("<h3 style='text-align: center; color: black;'>Daily Activity map(Positive)</h3>",unsafe_allow_html=True)
-            busy_day = helper.week_activity_map_sentiment(selected_user, df, 1)
-            fig, ax = plt.subplots()
-            ax.bar(busy_day.index, busy_day.values, color='green')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('week_activity_map_sentiment', 1), charts.bar(color='green'),
+                       lambda: helper.week_activity_map_sentiment(selected_user, df, 1))
         with col2:
             st.markdown("<h3 style='text-align: center; color: black;'>Daily Activity map(Neutral)</h3>",unsafe_allow_html=True)
-            busy_day = helper.week_activity_map_sentiment(selected_user, df, 0)
-            fig, ax = plt.subplots()
-            ax.bar(busy_day.index, busy_day.values, color='grey')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('week_activity_map_sentiment', 0), charts.bar(color='grey'),
+                       lambda: helper.week_activity_map_sentiment(selected_user, df, 0))
         with col3:
             st.markdown("<h3 style='text-align: center; color: black;'>Daily Activity map(Negative)</h3>",unsafe_allow_html=True)
-            busy_day = helper.week_activity_map_sentiment(selected_user, df, -1)
-            fig, ax = plt.subplots()
-            ax.bar(busy_day.index, busy_day.values, color='red')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('week_activity_map_sentiment', -1), charts.bar(color='red'),
+                       lambda: helper.week_activity_map_sentiment(selected_user, df, -1))
 
         # Weekly activity map
         col1, col2, col3 = st.columns(3)
         with col1:
-            try:
-                st.markdown("<h3 style='text-align: center; color: black;'>Weekly Activity Map(Positive)</h3>",unsafe_allow_html=True)
-                user_heatmap = helper.activity_heatmap_sentiment(selected_user, df, 1)
-                fig, ax = plt.subplots()
-                ax = sns.heatmap(user_heatmap)
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
-
+            st.markdown("<h3 style='text-align: center; color: black;'>Weekly Activity Map(Positive)</h3>",unsafe_allow_html=True)
+            show_chart(('activity_heatmap_sentiment', 1), charts.heatmap(),
+                       lambda: helper.activity_heatmap_sentiment(selected_user, df, 1))
         with col2:
-            try:
-                st.markdown("<h3 style='text-align: center; color: black;'>Weekly Activity Map(Neutral)</h3>",unsafe_allow_html=True)
-                user_heatmap = helper.activity_heatmap_sentiment(selected_user, df, 0)
-                fig, ax = plt.subplots()
-                ax = sns.heatmap(user_heatmap)
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
+            st.markdown("<h3 style='text-align: center; color: black;'>Weekly Activity Map(Neutral)</h3>",unsafe_allow_html=True)
+            show_chart(('activity_heatmap_sentiment', 0), charts.heatmap(),
+                       lambda: helper.activity_heatmap_sentiment(selected_user, df, 0))
         with col3:
-            try:
-                st.markdown("<h3 style='text-align: center; color: black;'>Weekly Activity Map(Negative)</h3>",unsafe_allow_html=True)
-                user_heatmap = helper.activity_heatmap_sentiment(selected_user, df, -1)
-                fig, ax = plt.subplots()
-                ax = sns.heatmap(user_heatmap)
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
+            st.markdown("<h3 style='text-align: center; color: black;'>Weekly Activity Map(Negative)</h3>",unsafe_allow_html=True)
+            show_chart(('activity_heatmap_sentiment', -1), charts.heatmap(),
+                       lambda: helper.activity_heatmap_sentiment(selected_user, df, -1))
 
         # Daily timeline
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("<h3 style='text-align: center; color: black;'>Daily Timeline(Positive)</h3>",unsafe_allow_html=True)
-            daily_timeline = helper.daily_timeline_sentiment(selected_user, df, 1)
-            fig, ax = plt.subplots()
-            ax.plot(daily_timeline['only_date'], daily_timeline['message'], color='green')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('daily_timeline_sentiment', 1), charts.line('only_date', 'message', color='green'),
+                       lambda: helper.daily_timeline_sentiment(selected_user, df, 1))
         with col2:
             st.markdown("<h3 style='text-align: center; color: black;'>Daily Timeline(Neutral)</h3>",unsafe_allow_html=True)
-            daily_timeline = helper.daily_timeline_sentiment(selected_user, df, 0)
-            fig, ax = plt.subplots()
-            ax.plot(daily_timeline['only_date'], daily_timeline['message'], color='grey')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('daily_timeline_sentiment', 0), charts.line('only_date', 'message', color='grey'),
+                       lambda: helper.daily_timeline_sentiment(selected_user, df, 0))
         with col3:
             st.markdown("<h3 style='text-align: center; color: black;'>Daily Timeline(Negative)</h3>",unsafe_allow_html=True)
-            daily_timeline = helper.daily_timeline_sentiment(selected_user, df, -1)
-            fig, ax = plt.subplots()
-            ax.plot(daily_timeline['only_date'], daily_timeline['message'], color='red')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('daily_timeline_sentiment', -1), charts.line('only_date', 'message', color='red'),
+                       lambda: helper.daily_timeline_sentiment(selected_user, df, -1))
 
         # Monthly timeline
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("<h3 style='text-align: center; color: black;'>Monthly Timeline(Positive)</h3>",unsafe_allow_html=True)
-            timeline = helper.monthly_timeline_sentiment(selected_user, df, 1)
-            fig, ax = plt.subplots()
-            ax.plot(timeline['time'], timeline['message'], color='green')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('monthly_timeline_sentiment', 1), charts.line('time', 'message', color='green'),
+                       lambda: helper.monthly_timeline_sentiment(selected_user, df, 1))
         with col2:
             st.markdown("<h3 style='text-align: center; color: black;'>Monthly Timeline(Neutral)</h3>",unsafe_allow_html=True)
-            timeline = helper.monthly_timeline_sentiment(selected_user, df, 0)
-            fig, ax = plt.subplots()
-            ax.plot(timeline['time'], timeline['message'], color='grey')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('monthly_timeline_sentiment', 0), charts.line('time', 'message', color='grey'),
+                       lambda: helper.monthly_timeline_sentiment(selected_user, df, 0))
         with col3:
             st.markdown("<h3 style='text-align: center; color: black;'>Monthly Timeline(Negative)</h3>",unsafe_allow_html=True)
-            timeline = helper.monthly_timeline_sentiment(selected_user, df, -1)
-            fig, ax = plt.subplots()
-            ax.plot(timeline['time'], timeline['message'], color='red')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
+            show_chart(('monthly_timeline_sentiment', -1), charts.line('time', 'message', color='red'),
+                       lambda: helper.monthly_timeline_sentiment(selected_user, df, -1))
 
         # Percentage contributed
         if selected_user == 'Overall':
             col1,col2,col3 = st.columns(3)
             with col1:
                 st.markdown("<h3 style='text-align: center; color: black;'>Most Positive Contribution</h3>",unsafe_allow_html=True)
-                x = helper.percentage(df, 1)
-                st.dataframe(x)
+                positive_share = helper.percentage(df, 1)
+                st.dataframe(positive_share)
             with col2:
                 st.markdown("<h3 style='text-align: center; color: black;'>Most Neutral Contribution</h3>",unsafe_allow_html=True)
-                y = helper.percentage(df, 0)
-                st.dataframe(y)
+                neutral_share = helper.percentage(df, 0)
+                st.dataframe(neutral_share)
             with col3:
                 st.markdown("<h3 style='text-align: center; color: black;'>Most Negative Contribution</h3>",unsafe_allow_html=True)
-                z = helper.percentage(df, -1)
-                st.dataframe(z)
+                negative_share = helper.percentage(df, -1)
+                st.dataframe(negative_share)
 
         # Most Positive,Negative,Neutral User...
         if selected_user == 'Overall':
-            x = df['user'][df['value'] == 1].value_counts().head(10)
-            y = df['user'][df['value'] == -1].value_counts().head(10)
-            z = df['user'][df['value'] == 0].value_counts().head(10)
-
             col1,col2,col3 = st.columns(3)
             with col1:
                 st.markdown("<h3 style='text-align: center; color: black;'>Most Positive Users</h3>",unsafe_allow_html=True)
-                fig, ax = plt.subplots()
-                ax.bar(x.index, x.values, color='green')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
+                show_chart('most_positive_users', charts.bar(color='green'),
+                           lambda: df['user'][df['value'] == 1].value_counts().head(10))
             with col2:
                 st.markdown("<h3 style='text-align: center; color: black;'>Most Neutral Users</h3>",unsafe_allow_html=True)
-                fig, ax = plt.subplots()
-                ax.bar(z.index, z.values, color='grey')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
+                show_chart('most_neutral_users', charts.bar(color='grey'),
+                           lambda: df['user'][df['value'] == 0].value_counts().head(10))
             with col3:
                 st.markdown("<h3 style='text-align: center; color: black;'>Most Negative Users</h3>",unsafe_allow_html=True)
-                fig, ax = plt.subplots()
-                ax.bar(y.index, y.values, color='red')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
+                show_chart('most_negative_users', charts.bar(color='red'),
+                           lambda: df['user'][df['value'] == -1].value_counts().head(10))
 
         # Sentiment Pie Chart
-        fig, ax = plt.subplots()
-        ax.pie(
-            [sentiment_summary['Positive'], sentiment_summary['Neutral'], sentiment_summary['Negative']],
-            labels=['Positive', 'Neutral', 'Negative'],
-            autopct="%1.1f%%",
-            colors=['#4CAF50', '#FFC107', '#F44336']
-        )
-        st.pyplot(fig)
+        show_chart('sentiment_pie',
+                   charts.pie(labels=['Positive', 'Neutral', 'Negative'], autopct="%1.1f%%",
+                              colors=['#4CAF50', '#FFC107', '#F44336']),
+                   lambda sentiment_summary=sentiment_summary: [sentiment_summary['Positive'], sentiment_summary['Neutral'], sentiment_summary['Negative']])
         
         # Sentiment Timeline
         st.subheader("Sentiment Over Time")
-        sentiment_timeline = helper.get_sentiment_timeline(selected_user, df)
-        fig, ax = plt.subplots(figsize=(10, 5))
-        sentiment_timeline.plot(ax=ax)
-        plt.xticks(rotation=45)
-        plt.legend(title='Sentiment')
-        st.pyplot(fig)
+        show_chart('sentiment_timeline', charts.frame_plot(rotation=45, legend_title='Sentiment'),
+                   lambda: helper.get_sentiment_timeline(selected_user, df), figsize=(10, 5))
         
     
         # Sentiment Word Clouds
@@ -354,62 +356,39 @@ if uploaded_file is not None:
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("**Positive Words**")
-            pos_wc = helper.get_sentiment_wordcloud(selected_user, df, 'Positive')
-            fig, ax = plt.subplots()
-            ax.imshow(pos_wc)
-            ax.axis('off')
-            st.pyplot(fig)
+            show_chart(('sentiment_wordcloud', 'Positive'), charts.image(axis=False),
+                       lambda: helper.get_sentiment_wordcloud(selected_user, messages_df, 'Positive'))
         with col2:
             st.markdown("**Neutral Words**")
-            neu_wc = helper.get_sentiment_wordcloud(selected_user, df, 'Neutral')
-            fig, ax = plt.subplots()
-            ax.imshow(neu_wc)
-            ax.axis('off')
-            st.pyplot(fig)
+            show_chart(('sentiment_wordcloud', 'Neutral'), charts.image(axis=False),
+                       lambda: helper.get_sentiment_wordcloud(selected_user, messages_df, 'Neutral'))
         with col3:
             st.markdown("**Negative Words**")
-            try:
-                neg_wc = helper.get_sentiment_wordcloud(selected_user, df, 'Negative')
-                fig, ax = plt.subplots()
-                ax.imshow(neg_wc)
-                ax.axis('off')
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
+            show_chart(('sentiment_wordcloud', 'Negative'), charts.image(axis=False),
+                       lambda: helper.get_sentiment_wordcloud(selected_user, messages_df, 'Negative'))
 
         # Most Common Words by Sentiment
         col1, col2, col3 = st.columns(3)
         with col1:
-            try:
-                most_common_df = helper.most_common_words_sentiment(selected_user, df, 1)
-                st.markdown("<h3 style='text-align: center; color: black;'>Positive Words</h3>",unsafe_allow_html=True)
-                fig, ax = plt.subplots()
-                ax.barh(most_common_df[0], most_common_df[1], color='green')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
+            st.markdown("<h3 style='text-align: center; color: black;'>Positive Words</h3>",unsafe_allow_html=True)
+            show_chart(('most_common_words_sentiment', 1), charts.barh(color='green'),
+                       lambda: helper.most_common_words_sentiment(selected_user, messages_df, 1))
         with col2:
-            try:
-                most_common_df = helper.most_common_words_sentiment(selected_user, df, 0)
-                st.markdown("<h3 style='text-align: center; color: black;'>Neutral Words</h3>",unsafe_allow_html=True)
-                fig, ax = plt.subplots()
-                ax.barh(most_common_df[0], most_common_df[1], color='grey')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
+            st.markdown("<h3 style='text-align: center; color: black;'>Neutral Words</h3>",unsafe_allow_html=True)
+            show_chart(('most_common_words_sentiment', 0), charts.barh(color='grey'),
+                       lambda: helper.most_common_words_sentiment(selected_user, messages_df, 0))
         with col3:
+            st.markdown("<h3 style='text-align: center; color: black;'>Negative Words</h3>",unsafe_allow_html=True)
+            show_chart(('most_common_words_sentiment', -1), charts.barh(color='red'),
+                       lambda: helper.most_common_words_sentiment(selected_user, messages_df, -1))
+
+        # Fill in the charts as their PNG bytes come back from the worker pool
+        for slot, future in pending:
             try:
-                most_common_df = helper.most_common_words_sentiment(selected_user, df, -1)
-                st.markdown("<h3 style='text-align: center; color: black;'>Negative Words</h3>",unsafe_allow_html=True)
-                fig, ax = plt.subplots()
-                ax.barh(most_common_df[0], most_common_df[1], color='red')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
+                png = future.result()
             except Exception as e:
-                st.warning(f"Could not generate visualization: {str(e)}")
-                st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
\ No newline at end of file
+                with slot.container():
+                    st.warning(f"Could not generate visualization: {str(e)}")
+                    st.info("This usually happens when there's not enough data for this specific user/sentiment combination")
+                continue
+            slot.image(png, width="stretch")
\ No newline at end of file
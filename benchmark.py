@@ -0,0 +1,71 @@
+import glob
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import preprocessor, helper
+from sketch import FrequentItems
+
+# Usage: python benchmark.py  (run from the repo root, next to stop_hinglish.txt)
+
+def load_sample_chats():
+    chats = {}
+    for path in sorted(glob.glob('WhatsApp Chat/*.txt')):
+        with open(path, encoding='utf-8') as f:
+            chats[path.split('/')[-1][:40]] = preprocessor.preprocess(f.read())
+    return chats
+
+def exact_word_counts(df):
+    stop_words = open('stop_hinglish.txt', 'r').read()
+    temp = helper.drop_notifications(df)
+    temp = temp[temp['message'] != '<Media omitted>']
+    return Counter(helper._words(temp['message'], stop_words))
+
+def sketch_accuracy(exact, sketch, k=20):
+    """Top-k recall and worst undercount of the sketch against exact counts"""
+    true_top = [item for item, _ in exact.most_common(k)]
+    approx_top = [item for item, _ in sketch.most_common(k)]
+    recall = len(set(true_top) & set(approx_top)) / max(len(true_top), 1)
+    worst = max((exact[item] - sketch.counts[item] for item in true_top), default=0)
+    return recall, worst
+
+def report_sketch_accuracy(chats, epsilons=(0.01, 0.002)):
+    print("Word sketch vs exact Counter (top-20)")
+    print(f"{'chat':42} {'eps':>6} {'kept':>6} {'distinct':>9} {'recall':>7} {'worst':>6} {'bound':>6}")
+    for epsilon in epsilons:
+        merged = FrequentItems(epsilon)
+        merged_exact = Counter()
+        for name, df in chats.items():
+            exact = exact_word_counts(df)
+            sketch = helper.word_sketch('Overall', df, epsilon)
+            merged.merge(sketch)
+            merged_exact.update(exact)
+            recall, worst = sketch_accuracy(exact, sketch)
+            print(f"{name:42} {epsilon:>6} {len(sketch.counts):>6} {len(exact):>9} {recall:>7.2f} {worst:>6} {sketch.error:>6}")
+        recall, worst = sketch_accuracy(merged_exact, merged)
+        print(f"{'(all chats, merged)':42} {epsilon:>6} {len(merged.counts):>6} {len(merged_exact):>9} {recall:>7.2f} {worst:>6} {merged.error:>6}")
+
+def synthetic_chat(n, users=50, seed=0):
+    """n messages from random users with exponential gaps (mean 10 minutes)"""
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(600, n).astype('int64')
+    dates = pd.Timestamp('2021-01-01') + pd.to_timedelta(np.cumsum(gaps), unit='s')
+    names = np.array([f'user{i}' for i in range(users)], dtype=object)
+    return pd.DataFrame({'date': dates, 'user': names[rng.integers(0, users, n)]})
+
+def report_sessionize_scaling(sizes=(125_000, 250_000, 500_000, 1_000_000, 2_000_000, 4_000_000)):
+    print("preprocessor.sessionize on synthetic chats")
+    print(f"{'messages':>10} {'seconds':>8} {'ns/msg':>7}")
+    for n in sizes:
+        df = synthetic_chat(n)
+        start = time.perf_counter()
+        df = preprocessor.sessionize(df)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>10} {elapsed:>8.3f} {elapsed / n * 1e9:>7.0f}")
+
+if __name__ == '__main__':
+    report_sketch_accuracy(load_sample_chats())
+    print()
+    report_sessionize_scaling()
@@ -0,0 +1,117 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # non-interactive backend; figures are only ever turned into PNG bytes
+from matplotlib.figure import Figure
+import seaborn as sns
+
+MAX_CACHED_CHARTS = 512
+DPI = 200  # same resolution st.pyplot saves at; images are stretched to the column width
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='charts')
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+def render(key, draw, compute, figsize=None):
+    """Return a Future with the chart's PNG bytes, rasterized off the script thread
+
+    key should identify (chat, user, chart, filters). On a cache hit neither
+    compute (the helper call) nor matplotlib runs again.
+    """
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            done = Future()
+            done.set_result(_cache[key])
+            return done
+    return _pool.submit(_rasterize, key, draw, compute, figsize)
+
+def once(compute):
+    """Wrap compute so that several charts sharing its result run it at most once"""
+    lock = threading.Lock()
+    result = []
+    def run():
+        with lock:
+            if not result:
+                result.append(compute())
+        return result[0]
+    return run
+
+def _rasterize(key, draw, compute, figsize):
+    # A bare Figure is never registered with pyplot, so nothing keeps it alive
+    # after this call; clear() drops its artists right away
+    fig = Figure(figsize=figsize)
+    try:
+        draw(fig.subplots(), compute())
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', bbox_inches='tight', dpi=DPI)
+    finally:
+        fig.clear()
+    png = buf.getvalue()
+
+    with _lock:
+        _cache[key] = png
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_CHARTS:
+            _cache.popitem(last=False)
+    return png
+
+# Draw functions: each returns a callable taking (ax, helper output)
+
+def line(x, y, color=None, rotation=90):
+    def draw(ax, data):
+        ax.plot(data[x], data[y], color=color)
+        ax.tick_params(axis='x', labelrotation=rotation)
+    return draw
+
+def bar(color=None):
+    """Bar chart of a value_counts() Series"""
+    def draw(ax, data):
+        ax.bar(data.index, data.values, color=color)
+        ax.tick_params(axis='x', labelrotation=90)
+    return draw
+
+def barh(color=None, y=0, width=1):
+    """Horizontal bars, by default of a (word, count) frame as returned by most_common_words"""
+    def draw(ax, data):
+        ax.barh(data[y], data[width], color=color)
+        ax.tick_params(axis='x', labelrotation=90)
+    return draw
+
+def hist(bins=30, color=None, xlabel=None):
+    def draw(ax, data):
+        ax.hist(data, bins=bins, color=color)
+        ax.set_xlabel(xlabel)
+    return draw
+
+def heatmap():
+    def draw(ax, data):
+        sns.heatmap(data, ax=ax)
+    return draw
+
+def image(axis=True):
+    def draw(ax, data):
+        ax.imshow(data)
+        if not axis:
+            ax.axis('off')
+    return draw
+
+def pie(labels=None, autopct=None, colors=None):
+    """Pie of a (label, count) frame, or of a plain list of values when labels are given"""
+    def draw(ax, data):
+        if labels is None:
+            ax.pie(data[1].head(), labels=data[0].head(), autopct=autopct, colors=colors)
+        else:
+            ax.pie(data, labels=labels, autopct=autopct, colors=colors)
+    return draw
+
+def frame_plot(rotation=45, legend_title=None):
+    """Plot every column of a frame against its index"""
+    def draw(ax, data):
+        data.plot(ax=ax)
+        ax.tick_params(axis='x', labelrotation=rotation)
+        ax.legend(title=legend_title)
+    return draw
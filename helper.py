@@ -1,15 +1,30 @@
+import re
 from urlextract import URLExtract
 from wordcloud import WordCloud
 import pandas as pd
 from collections import Counter
 import emoji
+from sketch import FrequentItems
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
 extract = URLExtract()
 
+def filter_user(selected_user, df):
+    """Return the rows of selected_user, reusing a per-user partition when df already is one"""
+    # Partitions built by preprocessor.partition_users carry their user in df.attrs,
+    # and any slice of them (e.g. a date window) still belongs to that one user
+    if selected_user == 'Overall' or df.attrs.get('user') == selected_user:
+        return df
+    return df[df['user'] == selected_user]
+
+def drop_notifications(df):
+    """Drop group notifications, skipping the scan for a single-user or messages-only partition"""
+    if df.attrs.get('messages_only') or df.attrs.get('user') not in (None, 'group_notification'):
+        return df
+    return df[df['user'] != 'group_notification']
+
 def fetch_stats(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
 
     # 1. Number of messages
     num_messages = df.shape[0]
@@ -29,21 +44,65 @@ def fetch_stats(selected_user, df):
 
     return num_messages, len(words), num_media_messages, len(links)
 
-def most_busy_users(df):
-    df = df[df['user'] != 'group_notification']  
-    x = df['user'].value_counts().head()
-    df = round((df['user'].value_counts()/df.shape[0])*100, 2).reset_index().rename(
+def most_busy_users(df, counts=None):
+    # counts (from preprocessor.message_counts) saves the value_counts pass over the chat
+    if counts is None:
+        counts = drop_notifications(df)['user'].value_counts()
+    x = counts.head()
+    df = round((counts/counts.sum())*100, 2).reset_index().rename(
         columns={'index':'name', 'user':'percent'})
     return x, df
 
-def create_wordcloud(selected_user, df):
+def _words(messages, stop_words):
+    for message in messages:
+        for word in message.lower().split():
+            if word not in stop_words:
+                yield word
+
+def word_sketch(selected_user, df, epsilon=0.001):
+    """Approximate word counts in bounded memory; sketches from other users or chats can be merged"""
+    f = open('stop_hinglish.txt', 'r')
+    stop_words = f.read()
+
+    df = filter_user(selected_user, df)
+
+    temp = drop_notifications(df)
+    temp = temp[temp['message'] != '<Media omitted>']
+    return FrequentItems(epsilon).update(_words(temp['message'], stop_words))
+
+def emoji_sketch(selected_user, df, epsilon=0.001):
+    """Approximate emoji counts in bounded memory"""
+    df = filter_user(selected_user, df)
+    emojis = (c for message in df['message'] for c in message if c in emoji.EMOJI_DATA)
+    return FrequentItems(epsilon).update(emojis)
+
+def _cloud_frequencies(sketch, wc):
+    # Re-tokenize the sketch's whitespace tokens the way WordCloud.generate would:
+    # its word pattern, its stopwords, no bare numbers and no trailing 's
+    freqs = Counter()
+    for token, count in sketch.most_common():
+        for word in re.findall(r"\w[\w']*", token):
+            if word.endswith("'s"):
+                word = word[:-2]
+            if word and not word.isdigit() and word not in wc.stopwords:
+                freqs[word] += count
+    return dict(freqs.most_common(wc.max_words))
+
+def create_wordcloud(selected_user, df, approx=False, epsilon=0.001, sketch=None):
+    if approx:
+        # Draw from the sketch instead of joining every message into one string;
+        # pass sketch to reuse the one built for most_common_words
+        wc = WordCloud(width=500, height=500, min_font_size=10, background_color='white')
+        if sketch is None:
+            sketch = word_sketch(selected_user, df, epsilon)
+        return wc.generate_from_frequencies(_cloud_frequencies(sketch, wc))
+
     f = open('stop_hinglish.txt', 'r')
     stop_words = f.read()
 
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
 
-    temp = df[df['user'] != 'group_notification']
+    temp = drop_notifications(df)
     temp = temp[temp['message'] != '<Media omitted>']
 
     def remove_stop_words(message):
@@ -58,14 +117,18 @@ def create_wordcloud(selected_user, df):
     df_wc = wc.generate(temp['message'].str.cat(sep=" "))
     return df_wc
 
-def most_common_words(selected_user, df):
+def most_common_words(selected_user, df, approx=False, epsilon=0.001, sketch=None):
+    if approx:
+        if sketch is None:
+            sketch = word_sketch(selected_user, df, epsilon)
+        return pd.DataFrame(sketch.most_common(20))
+
     f = open('stop_hinglish.txt', 'r')
     stop_words = f.read()
 
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
 
-    temp = df[df['user'] != 'group_notification']
+    temp = drop_notifications(df)
     temp = temp[temp['message'] != '<Media omitted>']
 
     words = []
@@ -77,9 +140,11 @@ def most_common_words(selected_user, df):
     most_common_df = pd.DataFrame(Counter(words).most_common(20))
     return most_common_df
 
-def emoji_helper(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+def emoji_helper(selected_user, df, approx=False, epsilon=0.001):
+    if approx:
+        return pd.DataFrame(emoji_sketch(selected_user, df, epsilon).most_common())
+
+    df = filter_user(selected_user, df)
         
     emojis = []
     for message in df['message']:
@@ -89,8 +154,7 @@ def emoji_helper(selected_user, df):
     return emoji_df
 
 def monthly_timeline(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     
     timeline = df.groupby(['year', 'month_num', 'month']).count()['message'].reset_index()
     
@@ -102,24 +166,20 @@ def monthly_timeline(selected_user, df):
     return timeline
 
 def daily_timeline(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     
     return df.groupby('only_date').count()['message'].reset_index()
 
 def week_activity_map(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     return df['day_name'].value_counts()
 
 def month_activity_map(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     return df['month'].value_counts()
 
 def activity_heatmap(selected_user, df):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     
     period_order = [
         '00-1', '1-2', '2-3', '3-4', '4-5', '5-6', '6-7', '7-8', '8-9', '9-10',
@@ -127,7 +187,8 @@ def activity_heatmap(selected_user, df):
         '18-19', '19-20', '20-21', '21-22', '22-23', '23-00'
     ]
 
-    df['period'] = pd.Categorical(df['period'], categories=period_order, ordered=True)
+    # assign() keeps the cached partition untouched
+    df = df.assign(period=pd.Categorical(df['period'], categories=period_order, ordered=True))
     user_heatmap = df.pivot_table(index='day_name', columns='period', values='message',
                                 aggfunc='count').fillna(0)
     return user_heatmap
@@ -143,6 +204,7 @@ def sentiment(d):
 def analyze_sentiment(df):
     """Calculate sentiment scores for all messages"""
     sia = SentimentIntensityAnalyzer()
+    df = df.copy()
     df['sentiment_scores'] = df['message'].apply(lambda x: sia.polarity_scores(str(x)))
     df['positive'] = df['sentiment_scores'].apply(lambda x: x['pos'])
     df['negative'] = df['sentiment_scores'].apply(lambda x: x['neg'])
@@ -161,8 +223,7 @@ def classify_sentiment(compound_score):
 
 def get_sentiment_summary(selected_user, df):
     """Get sentiment distribution for selected user"""
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     
     df = analyze_sentiment(df)
     df['sentiment'] = df['compound'].apply(classify_sentiment)
@@ -176,8 +237,7 @@ def get_sentiment_summary(selected_user, df):
 
 def get_sentiment_timeline(selected_user, df):
     """Get daily sentiment timeline"""
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     
     df = analyze_sentiment(df)
     df['sentiment'] = df['compound'].apply(classify_sentiment)
@@ -188,13 +248,12 @@ def get_sentiment_timeline(selected_user, df):
 
 def get_sentiment_wordcloud(selected_user, df, sentiment_type):
     """Generate wordcloud for specific sentiment"""
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     
     df = analyze_sentiment(df)
     df['sentiment'] = df['compound'].apply(classify_sentiment)
     
-    temp = df[df['user'] != 'group_notification']
+    temp = drop_notifications(df)
     temp = temp[temp['message'] != '<Media omitted>']
     temp = temp[temp['sentiment'] == sentiment_type]
     
@@ -216,34 +275,29 @@ def get_sentiment_wordcloud(selected_user, df, sentiment_type):
 
 # Sentiment-specific analysis functions
 def week_activity_map_sentiment(selected_user, df, k):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     df = df[df['value'] == k]
     return df['day_name'].value_counts()
 
 def month_activity_map_sentiment(selected_user, df, k):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     df = df[df['value'] == k]
     return df['month'].value_counts()
 
 def activity_heatmap_sentiment(selected_user, df, k):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     df = df[df['value'] == k]
     user_heatmap = df.pivot_table(index='day_name', columns='period', values='message', aggfunc='count').fillna(0)
     return user_heatmap
 
 def daily_timeline_sentiment(selected_user, df, k):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     df = df[df['value'] == k]
     daily_timeline = df.groupby('only_date').count()['message'].reset_index()
     return daily_timeline
 
 def monthly_timeline_sentiment(selected_user, df, k):
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = filter_user(selected_user, df)
     df = df[df['value'] == k]
     timeline = df.groupby(['year', 'month_num', 'month']).count()['message'].reset_index()
     time = []
@@ -260,9 +314,8 @@ def percentage(df, k):
 def most_common_words_sentiment(selected_user, df, k):
     f = open('stop_hinglish.txt','r')
     stop_words = f.read()
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
-    temp = df[df['user'] != 'group_notification']
+    df = filter_user(selected_user, df)
+    temp = drop_notifications(df)
     temp = temp[temp['message'] != '<Media omitted>']
     words = []
     for message in temp['message'][temp['value'] == k]:
@@ -270,4 +323,38 @@ def most_common_words_sentiment(selected_user, df, k):
             if word not in stop_words:
                 words.append(word)
     most_common_df = pd.DataFrame(Counter(words).most_common(20))
-    return most_common_df
\ No newline at end of file
+    return most_common_df
+
+# Conversation session functions (need the columns added by preprocessor.sessionize)
+def session_summary(selected_user, df):
+    """Sessions joined and started, messages per session and median reply time"""
+    df = filter_user(selected_user, df)
+    df = df[df['session_id'] >= 0]
+    sessions = df['session_id'].nunique()
+    return {
+        'Sessions': sessions,
+        'Started': int(df['session_start'].sum()),
+        'Messages per Session': round(df.shape[0] / sessions, 2) if sessions else 0,
+        'Median Reply (min)': round(float(df['reply_minutes'].median()), 2) if df['reply_minutes'].notna().any() else 0
+    }
+
+def session_lengths(df):
+    """Number of messages in each session of the chat"""
+    return df['session_id'][df['session_id'] >= 0].value_counts()
+
+def conversation_starters(df):
+    return df['user'][df['session_start']].value_counts().head(10)
+
+def reply_times(selected_user, df):
+    """Reply count and median/mean reply time per responder, fastest first"""
+    df = filter_user(selected_user, df)
+    replies = df[df['reply_minutes'].notna()]
+    timing = replies.groupby('user')['reply_minutes'].agg(['count', 'median', 'mean']).round(2)
+    return timing.sort_values('median').reset_index().rename(
+        columns={'count': 'replies', 'median': 'median_minutes', 'mean': 'mean_minutes'})
+
+def reply_matrix(selected_user, df):
+    """How often each user (rows) replied to each other user (columns)"""
+    df = filter_user(selected_user, df)
+    replies = df[df['reply_minutes'].notna()]
+    return pd.crosstab(replies['user'], replies['reply_to'])
\ No newline at end of file
@@ -1,4 +1,5 @@
 import re
+import numpy as np
 import pandas as pd
 
 def preprocess(data):
@@ -68,4 +69,102 @@ def preprocess(data):
             period.append(f"{hour}-{hour+1}")
     df['period'] = period
 
-    return df
\ No newline at end of file
+    # Keep rows in time order so date windows can be cut with a binary search
+    df = df.sort_values('date', kind='stable', ignore_index=True)
+
+    return df
+
+def sessionize(df, gap_minutes=60):
+    """Add conversation session and reply-latency columns to a preprocessed chat
+
+    A new session starts when nobody has written for more than gap_minutes.
+    A message is a reply when it continues a session and its sender differs
+    from the previous message's sender. Group notifications are left out
+    (session_id -1). Returns a new date-sorted frame; df is left untouched.
+    """
+    # Everything below is NumPy diffs/shifts over one sorted pass, no per-message Python loop
+    if df['date'].is_monotonic_increasing:
+        df = df.copy()
+    else:
+        df = df.sort_values('date', kind='stable', ignore_index=True)
+
+    is_message = (df['user'] != 'group_notification').to_numpy()
+    msgs = df[is_message]
+    seconds = msgs['date'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    codes, users = pd.factorize(msgs['user'])
+
+    gaps = np.diff(seconds, prepend=seconds[:1])
+    starts = np.ones(len(msgs), dtype=bool)
+    starts[1:] = gaps[1:] > gap_minutes * 60
+    prev_codes = np.roll(codes, 1)
+    replies = ~starts & (codes != prev_codes)
+
+    session_id = np.full(len(df), -1, dtype=np.int64)
+    session_id[is_message] = np.cumsum(starts) - 1
+    session_start = np.zeros(len(df), dtype=bool)
+    session_start[is_message] = starts
+    reply_to = np.full(len(df), None, dtype=object)
+    reply_to[is_message] = np.where(replies, np.asarray(users, dtype=object)[prev_codes], None)
+    reply_minutes = np.full(len(df), np.nan)
+    reply_minutes[is_message] = np.where(replies, gaps / 60, np.nan)
+
+    df['session_id'] = session_id
+    df['session_start'] = session_start
+    df['reply_to'] = reply_to
+    df['reply_minutes'] = reply_minutes
+    return df
+
+def partition_users(df):
+    """Split the frame into one sub-frame per user
+
+    Returns (partitions, message_rows): partitions maps each user to their rows
+    and message_rows holds the positions in df of every row except group
+    notifications (see filter_messages). The whole chat is df itself.
+    """
+    # Built once at ingest; groupby().indices gives each user's row positions in a
+    # single pass, so selecting a user later costs O(that user's messages)
+    partitions = {}
+    is_message = np.ones(df.shape[0], dtype=bool)
+    for user, rows in df.groupby('user', sort=False).indices.items():
+        part = df.iloc[rows]
+        part.attrs['user'] = user  # lets helper.filter_user skip its full-column scan
+        partitions[user] = part
+        if user == 'group_notification':
+            is_message[rows] = False
+    # Positions only, so the cache does not hold another copy of the chat
+    return partitions, np.flatnonzero(is_message)
+
+def message_counts(partitions, start=None, end=None):
+    """Messages per user between start and end, taken from the partition sizes"""
+    # Two binary searches per user instead of a value_counts over the whole chat
+    counts = pd.Series({user: filter_by_date(part, start, end).shape[0]
+                        for user, part in partitions.items() if user != 'group_notification'},
+                       dtype='int64')
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    counts.index.name = 'user'
+    counts.name = 'count'
+    return counts
+
+def _date_bounds(df, start=None, end=None):
+    # searchsorted on the sorted 'date' column finds both edges in O(log n)
+    lo = 0
+    hi = df.shape[0]
+    if start is not None:
+        lo = df['date'].searchsorted(pd.Timestamp(start), side='left')
+    if end is not None:
+        hi = df['date'].searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1), side='left')
+    return lo, hi
+
+def filter_by_date(df, start=None, end=None):
+    """Slice a date-sorted frame to the rows between start and end (both days inclusive)"""
+    # iloc returns a slice instead of scanning a boolean mask
+    lo, hi = _date_bounds(df, start, end)
+    return df.iloc[lo:hi]
+
+def filter_messages(df, message_rows, start=None, end=None):
+    """Rows of the whole chat between start and end, without group notifications"""
+    # message_rows is sorted, so the window's positions are found by binary search too
+    lo, hi = _date_bounds(df, start, end)
+    messages = df.iloc[message_rows[message_rows.searchsorted(lo):message_rows.searchsorted(hi)]]
+    messages.attrs['messages_only'] = True  # lets helper.drop_notifications return it as-is
+    return messages
\ No newline at end of file
@@ -0,0 +1,56 @@
+import heapq
+import math
+from collections import Counter
+from itertools import islice
+
+class FrequentItems:
+    """Bounded-memory top-K counter (Misra-Gries summary)
+
+    Keeps at most `capacity` counters. Every estimate is at most `error`
+    below the true count and never above it, with error <= total / (capacity + 1).
+    Summaries of the same capacity built over different chunks, users or chats
+    can be merged.
+    """
+
+    def __init__(self, epsilon=0.001, capacity=None, chunk_size=100_000):
+        # epsilon is the allowed error as a fraction of all counted items
+        self.capacity = capacity if capacity is not None else math.ceil(1 / epsilon)
+        self.chunk_size = chunk_size
+        self.counts = Counter()
+        self.total = 0
+        self.error = 0
+
+    def update(self, items):
+        """Count an iterable of items, holding at most chunk_size of them at a time"""
+        items = iter(items)
+        while True:
+            chunk = Counter(islice(items, self.chunk_size))
+            if not chunk:
+                break
+            self.total += sum(chunk.values())
+            self.counts.update(chunk)
+            self._shrink()
+        return self
+
+    def merge(self, other):
+        """Fold another summary of the same capacity into this one; the result keeps the same guarantee"""
+        # A smaller sketch carries more error per item than this one's bound allows
+        if other.capacity != self.capacity:
+            raise ValueError(f"cannot merge a sketch of capacity {other.capacity} into one of capacity {self.capacity}")
+        self.total += other.total
+        self.error += other.error
+        self.counts.update(other.counts)
+        self._shrink()
+        return self
+
+    def _shrink(self):
+        if len(self.counts) <= self.capacity:
+            return
+        # Subtract the (capacity + 1)-th largest count from everything and drop
+        # whatever is left at zero; this is what bounds both memory and error
+        cut = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.error += cut
+        self.counts = Counter({item: count - cut for item, count in self.counts.items() if count > cut})
+
+    def most_common(self, n=None):
+        return self.counts.most_common(n)